@@ -1,4 +1,6 @@
 # Importação das bibliotecas necessárias
+import os
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -14,127 +16,258 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Estilização CSS personalizada para melhorar a aparência visual
-st.markdown("""
-<style>
-    /* Estilos gerais */
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
+@st.cache_data
+def load_css(path):
+    """
+    Lê a folha de estilos CSS do dashboard, uma única vez por processo.
     
-    /* Estilos para métricas */
-    .metric-container {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    .stMetric {
-        margin-bottom: 1rem;
-        text-align: center !important;
-        align-items: center !important;
-        justify-content: center !important;
-    }
-    .stMetric [data-testid="stMetricValue"] {
-        font-size: 2rem;
-        text-align: center !important;
-        width: 100%;
-        display: block;
-    }
-    .stMetric [data-testid="stMetricLabel"] {
-        font-size: 1.2rem;
-        text-align: center !important;
-        width: 100%;
-        display: block;
-    }
+    Args:
+        path (str): Caminho do arquivo CSS
     
-    /* Estilos para gráficos */
-    .stPlotlyChart {
-        margin-top: 1rem;
-    }
-    .js-plotly-plot .plotly .gtitle,
-    .js-plotly-plot .plotly .g-gtitle text,
-    .stPlotlyChart .plotly-graph-div .gtitle {
-        text-anchor: middle !important;
-    }
+    Returns:
+        str: Conteúdo do arquivo CSS
+    """
+    with open(path, encoding='utf-8') as css_file:
+        return css_file.read()
+
+# Estilização CSS personalizada para melhorar a aparência visual. O estilo é emitido
+# em cada execução completa (o Streamlit remove elementos não emitidos novamente),
+# mas não nas reexecuções dos fragmentos de cada aba
+st.markdown(f"<style>\n{load_css('style.css')}</style>", unsafe_allow_html=True)
+
+# Colunas utilizadas pelo dashboard em cada conjunto de dados
+DATA_COLUMNS = [
+    'ano', 'curso', 'course_id', 'nome_universidade', 'nome_faculdade',
+    'vagas_iniciais', 'colocados', 'taxa_ocupacao', 'nota_ultimo_colocado', 'vagas_sobrantes'
+]
+PREDICTION_COLUMNS = ['course_id', 'nota_ultimo_colocado_prevista', 'colocados_previsto']
+# Colunas de texto com muitos valores repetidos, armazenadas como categorias
+CATEGORY_COLUMNS = ['course_id', 'nome_universidade', 'nome_faculdade', 'curso']
+# Número de pontos a partir do qual os gráficos usam WebGL (mesmo limite do plotly.express)
+WEBGL_POINT_THRESHOLD = 1000
+# Número máximo de pontos por traço; séries maiores são reduzidas antes de plotar
+MAX_TRACE_POINTS = 500
+# Número máximo de combinações de cursos guardadas nas caches de comparação
+COMPARISON_CACHE_ENTRIES = 128
+# Layout comum a todos os gráficos, definido uma única vez
+BASE_CHART_LAYOUT = {
+    'xaxis_title': 'Ano',
+    'xaxis': {'tickformat': '.0f'},
+    'margin': {'t': 40, 'b': 30, 'l': 30, 'r': 30},
+}
+# Posição do título dos gráficos (centralizado no topo)
+CHART_TITLE_POSITION = {'x': 0.5, 'y': 0.95, 'xanchor': 'center', 'yanchor': 'top'}
+
+def get_parquet_path(csv_path):
+    """
+    Converte um arquivo CSV para Parquet, caso ainda não exista uma versão atualizada.
     
-    /* Estilos para tabelas */
-    .stDataFrame table,
-    .stTable table,
-    div[data-testid="stTable"] table {
-        margin: 0 auto !important;
-    }
-    .stDataFrame table thead tr th,
-    .stTable table th,
-    div[data-testid="stTable"] th {
-        text-align: center !important;
-        vertical-align: middle !important;
-    }
-    .stDataFrame table tbody tr td,
-    .stTable table td,
-    div[data-testid="stTable"] td {
-        text-align: center !important;
-        vertical-align: middle !important;
-    }
+    Args:
+        csv_path (str): Caminho do arquivo CSV
     
-    /* Estilos para abas */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+    Returns:
+        str: Caminho do arquivo Parquet correspondente
+    """
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        return parquet_path
+    pd.read_csv(csv_path).to_parquet(parquet_path, compression='zstd', index=False)
+    return parquet_path
 
-# Função para carregar os dados dos arquivos CSV
+def read_data_file(csv_path, columns):
+    """
+    Lê as colunas indicadas da versão Parquet de um arquivo CSV.
+    
+    Args:
+        csv_path (str): Caminho do arquivo CSV
+        columns (list): Colunas a ler
+    
+    Returns:
+        DataFrame: Dados lidos
+    """
+    return pd.read_parquet(get_parquet_path(csv_path), columns=columns)
+
+# Função para carregar os dados do dashboard
 @st.cache_data
 def load_data():
     """
-    Carrega os dados dos arquivos CSV necessários para o dashboard.
+    Carrega os dados necessários para o dashboard.
+    
+    Os arquivos CSV são convertidos para Parquet na primeira execução, e apenas
+    as colunas utilizadas pelo dashboard são lidas. Os dois arquivos são lidos em
+    paralelo, pois a leitura de Parquet libera o GIL. Faculdades em falta são
+    preenchidas com 'N/A' e as colunas de texto repetidas são convertidas para o
+    tipo category.
+    
+    Além dos dados originais, devolve uma cópia indexada por course_id e ordenada
+    por curso e ano, usada para obter as linhas de um curso sem percorrer todo o DataFrame.
+    As previsões são devolvidas como um dicionário indexado por course_id.
     
     Returns:
-        tuple: (DataFrame com dados históricos, DataFrame com previsões) ou (None, None) em caso de erro
+        tuple: (DataFrame com dados históricos, DataFrame indexado por curso, dicionário com previsões)
+            ou (None, None, None) em caso de erro
     """
     try:
-        df = pd.read_csv('cleaned_data.csv')
-        predictions = pd.read_csv('predictions_2025.csv')
-        return df, predictions
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            data_future = executor.submit(read_data_file, 'cleaned_data.csv', DATA_COLUMNS)
+            predictions_future = executor.submit(read_data_file, 'predictions_2025.csv', PREDICTION_COLUMNS)
+            df = data_future.result()
+            predictions = predictions_future.result()
+        df['nome_faculdade'] = df['nome_faculdade'].fillna('N/A')
+        df = df.astype({column: 'category' for column in CATEGORY_COLUMNS})
+        df_by_course = (
+            df.sort_values(['course_id', 'ano'], kind='stable')
+            .set_index('course_id', drop=False)
+            .rename_axis(None)
+        )
+        predictions = predictions.set_index('course_id').to_dict('index')
+        return df, df_by_course, predictions
     except FileNotFoundError:
         st.error("❌ Arquivo 'cleaned_data.csv' ou 'predictions_2025.csv' não encontrado. Por favor, faça upload dos seus conjuntos de dados.")
-        return None, None
+        return None, None, None
+
+def get_course_data(df_by_course, course_ids):
+    """
+    Obtém as linhas dos cursos indicados através do índice por course_id.
+    
+    Args:
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
+        course_ids (list): Lista de IDs dos cursos
+    
+    Returns:
+        DataFrame: Linhas dos cursos encontrados, ordenadas por curso e ano
+    """
+    return df_by_course.loc[[course_id for course_id in course_ids if course_id in df_by_course.index]]
+
+@st.cache_data
+def build_course_aggregates(_df_by_course):
+    """
+    Calcula uma única vez as métricas históricas de cada curso.
+    
+    O DataFrame não é incluído na chave da cache (prefixo "_"), pois os dados
+    carregados por load_data() não mudam durante a execução da aplicação.
+    
+    Args:
+        _df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id,
+            ordenado por curso e ano
+    
+    Returns:
+        dict: {course_id: {'avg_occupancy', 'avg_grade', 'last_year', 'last_grade', 'last_placed'}}
+    """
+    averages = _df_by_course.groupby('course_id', observed=True, sort=False).agg(
+        avg_occupancy=('taxa_ocupacao', 'mean'),
+        avg_grade=('nota_ultimo_colocado', 'mean')
+    )
+    most_recent = (
+        _df_by_course.drop_duplicates(subset=['course_id'], keep='last')
+        .set_index('course_id')[['ano', 'nota_ultimo_colocado', 'colocados']]
+        .rename(columns={'ano': 'last_year', 'nota_ultimo_colocado': 'last_grade', 'colocados': 'last_placed'})
+    )
+    return averages.join(most_recent).to_dict('index')
+
+@st.cache_data
+def build_course_metadata(_df_by_course):
+    """
+    Obtém o nome, a universidade e a faculdade de cada curso, a partir do seu primeiro registo.
+    
+    O DataFrame não é incluído na chave da cache (prefixo "_"), pois os dados
+    carregados por load_data() não mudam durante a execução da aplicação.
+    
+    Args:
+        _df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id,
+            ordenado por curso e ano
+    
+    Returns:
+        DataFrame: Colunas curso, nome_universidade e nome_faculdade, indexadas por course_id
+    """
+    return (
+        _df_by_course.drop_duplicates(subset=['course_id'])
+        .set_index('course_id')[['curso', 'nome_universidade', 'nome_faculdade']]
+    )
 
-def create_metric_columns(course_data, predictions, selected_course):
+def create_metric_columns(course_stats, predictions, selected_course):
     """
     Cria e exibe as métricas principais para um curso.
     
     Args:
-        course_data (DataFrame): Dados históricos do curso
-        predictions (DataFrame): Previsões para 2025
+        course_stats (dict): Métricas históricas do curso, calculadas por build_course_aggregates()
+        predictions (dict): Previsões para 2025 por course_id
         selected_course (str): ID do curso selecionado
     """
-    avg_occupancy = course_data['taxa_ocupacao'].mean() * 100
-    avg_grade = course_data['nota_ultimo_colocado'].mean()
-    most_recent_year = course_data.iloc[-1]
-    last_grade = most_recent_year['nota_ultimo_colocado']
-    last_placed = most_recent_year['colocados']
-    course_predictions = predictions[predictions['course_id'] == selected_course]
-    has_predictions = not course_predictions.empty
+    avg_occupancy = course_stats['avg_occupancy'] * 100
+    avg_grade = course_stats['avg_grade']
+    last_year = int(course_stats['last_year'])
+    last_grade = course_stats['last_grade']
+    last_placed = course_stats['last_placed']
+    course_predictions = predictions.get(selected_course)
 
     metrics_cols = st.columns(6)
     metrics_cols[0].metric("Taxa Média de Ocupação", f"{avg_occupancy:.0f}%")
     metrics_cols[1].metric("Nota Média do Último Colocado", f"{avg_grade:.1f}")
-    metrics_cols[2].metric(f"Nota do Último Colocado ({int(most_recent_year['ano'])})", f"{last_grade:.1f}")
-    metrics_cols[3].metric(f"Alunos Colocados ({int(most_recent_year['ano'])})", f"{int(last_placed)}")
+    metrics_cols[2].metric(f"Nota do Último Colocado ({last_year})", f"{last_grade:.1f}")
+    metrics_cols[3].metric(f"Alunos Colocados ({last_year})", f"{int(last_placed)}")
     
-    if has_predictions:
-        metrics_cols[4].metric("Previsão Nota do Último Colocado 2025", f"{course_predictions['nota_ultimo_colocado_prevista'].iloc[0]:.1f}")
-        metrics_cols[5].metric("Previsão Alunos Colocados 2025", f"{int(course_predictions['colocados_previsto'].iloc[0])}")
+    if course_predictions is not None:
+        metrics_cols[4].metric("Previsão Nota do Último Colocado 2025", f"{course_predictions['nota_ultimo_colocado_prevista']:.1f}")
+        metrics_cols[5].metric("Previsão Alunos Colocados 2025", f"{int(course_predictions['colocados_previsto'])}")
     else:
         metrics_cols[4].empty()
         metrics_cols[5].empty()
 
+def downsample_series(x, y, max_points=MAX_TRACE_POINTS):
+    """
+    Reduz uma série para no máximo max_points pontos, mantendo a sua forma.
+    
+    Os pontos são divididos em intervalos e, de cada intervalo, são mantidos os
+    pontos de valor mínimo e máximo, além do primeiro e do último ponto da série.
+    
+    Args:
+        x (array-like): Valores do eixo x
+        y (array-like): Valores do eixo y
+        max_points (int): Número máximo de pontos
+    
+    Returns:
+        tuple: (x, y) - Séries originais ou arrays reduzidos
+    """
+    if len(x) <= max_points:
+        return x, y
+    
+    x_values = np.asarray(x)
+    y_values = np.asarray(y, dtype=float)
+    indices = [0, len(y_values) - 1]
+    for bin_indices in np.array_split(np.arange(len(y_values)), (max_points - 2) // 2):
+        bin_values = y_values[bin_indices]
+        indices.append(bin_indices[np.argmin(bin_values)])
+        indices.append(bin_indices[np.argmax(bin_values)])
+    indices = np.unique(indices)
+    return x_values[indices], y_values[indices]
+
+def create_line_trace(x, y, use_webgl=False, line=None, **kwargs):
+    """
+    Cria um traço de linha, renderizado com WebGL (Scattergl) para séries grandes.
+    
+    Séries com mais de MAX_TRACE_POINTS pontos são reduzidas com downsample_series().
+    
+    Args:
+        x (Series): Valores do eixo x
+        y (Series): Valores do eixo y
+        use_webgl (bool): Usa go.Scattergl em vez de go.Scatter
+        line (dict): Estilo da linha
+        **kwargs: Demais propriedades do traço
+    
+    Returns:
+        BaseTraceType: Traço Plotly
+    """
+    x, y = downsample_series(x, y)
+    line = dict(line or {})
+    if use_webgl:
+        # Scattergl não suporta linhas suavizadas (spline)
+        line.pop('shape', None)
+        return go.Scattergl(x=x, y=y, line=line, **kwargs)
+    return go.Scatter(x=x, y=y, line=line, **kwargs)
+
 def create_evolution_charts(course_data):
     """
     Cria os gráficos de evolução para um curso.
@@ -145,55 +278,41 @@ def create_evolution_charts(course_data):
     Returns:
         tuple: (fig1, fig2) - Figuras Plotly para número de colocados e nota do último colocado
     """
+    use_webgl = len(course_data) > WEBGL_POINT_THRESHOLD
+    
     # Gráfico de número de colocados
-    fig1 = px.line(
-        course_data, 
-        x='ano', 
-        y='colocados',
-        title='Número de Colocados ao Longo do Tempo',
-        markers=True,
-        line_shape='spline'
-    )
+    fig1 = go.Figure(create_line_trace(
+        course_data['ano'],
+        course_data['colocados'],
+        use_webgl=use_webgl,
+        mode='lines+markers',
+        line=dict(shape='spline', color='#1f77b4'),
+        marker=dict(size=8),
+        hovertemplate='ano=%{x}<br>colocados=%{y}<extra></extra>'
+    ))
     fig1.update_layout(
+        **BASE_CHART_LAYOUT,
         yaxis_title="Número de Colocados",
-        xaxis_title="Ano",
         height=250,
-        xaxis=dict(tickformat='.0f'),
-        margin=dict(t=40, b=30, l=30, r=30),
-        title={
-            'text': 'Número de Colocados ao Longo do Tempo',
-            'x': 0.5,
-            'y': 0.95,
-            'xanchor': 'center',
-            'yanchor': 'top'
-        }
+        title={'text': 'Número de Colocados ao Longo do Tempo', **CHART_TITLE_POSITION}
     )
-    fig1.update_traces(line_color='#1f77b4', marker_size=8)
 
     # Gráfico de nota do último colocado
-    fig2 = px.line(
-        course_data, 
-        x='ano', 
-        y='nota_ultimo_colocado',
-        title='Nota do Último Colocado',
-        markers=True,
-        line_shape='spline'
-    )
+    fig2 = go.Figure(create_line_trace(
+        course_data['ano'],
+        course_data['nota_ultimo_colocado'],
+        use_webgl=use_webgl,
+        mode='lines+markers',
+        line=dict(shape='spline', color='#1f77b4'),
+        marker=dict(size=8),
+        hovertemplate='ano=%{x}<br>nota_ultimo_colocado=%{y}<extra></extra>'
+    ))
     fig2.update_layout(
+        **BASE_CHART_LAYOUT,
         yaxis_title="Nota",
-        xaxis_title="Ano",
         height=250,
-        xaxis=dict(tickformat='.0f'),
-        margin=dict(t=40, b=30, l=30, r=30),
-        title={
-            'text': 'Nota do Último Colocado',
-            'x': 0.5,
-            'y': 0.95,
-            'xanchor': 'center',
-            'yanchor': 'top'
-        }
+        title={'text': 'Nota do Último Colocado', **CHART_TITLE_POSITION}
     )
-    fig2.update_traces(line_color='#1f77b4', marker_size=8)
 
     return fig1, fig2
 
@@ -212,47 +331,57 @@ def create_detailed_table(course_data):
         'Ano', 'Vagas Iniciais', 'Alunos Colocados', 'Taxa de Ocupação',
         'Nota do Último Colocado', 'Vagas Restantes'
     ]
-    display_data['Taxa de Ocupação'] = (display_data['Taxa de Ocupação'] * 100).round(0).astype(int).astype(str) + '%'
-    display_data['Nota do Último Colocado'] = display_data['Nota do Último Colocado'].round(1)
-    display_data['Vagas Iniciais'] = display_data['Vagas Iniciais'].astype(int)
-    display_data['Alunos Colocados'] = display_data['Alunos Colocados'].astype(int)
-    display_data['Vagas Restantes'] = display_data['Vagas Restantes'].astype(int)
-    display_data = display_data.reset_index(drop=True)
-    st.table(display_data)
+    # Mantém os valores numéricos; a formatação é feita pelo column_config
+    display_data['Taxa de Ocupação'] = display_data['Taxa de Ocupação'] * 100
+    st.dataframe(
+        display_data,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Ano": st.column_config.NumberColumn("Ano", format="%d"),
+            "Vagas Iniciais": st.column_config.NumberColumn("Vagas Iniciais", format="%d"),
+            "Alunos Colocados": st.column_config.NumberColumn("Alunos Colocados", format="%d"),
+            "Taxa de Ocupação": st.column_config.NumberColumn("Taxa de Ocupação", format="%.0f%%"),
+            "Nota do Último Colocado": st.column_config.NumberColumn("Nota do Último Colocado", format="%.1f"),
+            "Vagas Restantes": st.column_config.NumberColumn("Vagas Restantes", format="%d"),
+        }
+    )
 
-def create_course_evolution_view(df, predictions, selected_course, year_range):
+def create_course_evolution_view(df_by_course, predictions, selected_course, year_range):
     """
     Cria visualizações da evolução do curso ao longo do tempo.
     
     Args:
-        df (DataFrame): DataFrame com dados históricos
-        predictions (DataFrame): DataFrame com previsões
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
+        predictions (dict): Previsões para 2025 por course_id
         selected_course (str): ID do curso selecionado
         year_range (tuple): Tupla com (ano_inicial, ano_final)
     """
-    # Filtra dados para o curso e período selecionados
-    course_data = df[
-        (df['course_id'] == selected_course) & 
-        (df['ano'] >= year_range[0]) & 
-        (df['ano'] <= year_range[1])
-    ].sort_values('ano')
+    # Filtra dados para o curso e período selecionados. As linhas de cada curso
+    # já estão ordenadas por ano, então o período é obtido por busca binária
+    course_data = get_course_data(df_by_course, [selected_course])
+    years = course_data['ano'].to_numpy()
+    start = np.searchsorted(years, year_range[0], side='left')
+    end = np.searchsorted(years, year_range[1], side='right')
+    course_data = course_data.iloc[start:end]
     
     if course_data.empty:
         st.warning("Nenhum dado encontrado para o curso e período selecionados.")
         return
     
     # Obtém informações do curso
-    course_name = course_data['curso'].iloc[0]
-    university_name = course_data['nome_universidade'].iloc[0]
-    faculty_name = course_data['nome_faculdade'].iloc[0]
+    course_info = build_course_metadata(df_by_course).loc[selected_course]
+    course_name = course_info['curso']
+    university_name = course_info['nome_universidade']
+    faculty_name = course_info['nome_faculdade']
     
     st.markdown(f"### 📈 Análise de Evolução: {course_name}")
     st.markdown(f"**Universidade:** {university_name}")
     st.markdown(f"**Faculdade:** {faculty_name}")
 
-    # Exibe métricas principais
+    # Exibe métricas principais, calculadas sobre todo o histórico do curso
     st.markdown("#### 📊 Métricas Principais")
-    create_metric_columns(course_data, predictions, selected_course)
+    create_metric_columns(build_course_aggregates(df_by_course)[selected_course], predictions, selected_course)
 
     # Cria gráficos lado a lado
     chart_col1, chart_col2 = st.columns(2)
@@ -267,14 +396,18 @@ def create_course_evolution_view(df, predictions, selected_course, year_range):
     with st.expander('📋 Dados Detalhados', expanded=False):
         create_detailed_table(course_data)
 
-def create_comparison_chart(historical_data, predictions, selected_courses, y_column, title, y_axis_title):
+@st.cache_data(max_entries=COMPARISON_CACHE_ENTRIES)
+def create_comparison_chart(_historical_data, _predictions, selected_courses, y_column, title, y_axis_title):
     """
     Cria um gráfico de comparação para múltiplos cursos.
     
+    O resultado fica em cache, identificado pelos cursos e pela coluna plotada; os
+    DataFrames não são incluídos na chave (prefixo "_"), pois derivam dos cursos.
+    
     Args:
-        historical_data (DataFrame): Dados históricos dos cursos
-        predictions (DataFrame): Previsões para 2025
-        selected_courses (list): Lista de IDs dos cursos selecionados
+        _historical_data (DataFrame): Dados históricos dos cursos indexados por course_id
+        _predictions (dict): Previsões para 2025 por course_id
+        selected_courses (tuple): IDs dos cursos selecionados
         y_column (str): Nome da coluna a ser plotada no eixo y
         title (str): Título do gráfico
         y_axis_title (str): Título do eixo y
@@ -283,6 +416,7 @@ def create_comparison_chart(historical_data, predictions, selected_courses, y_co
         Figure: Figura Plotly com o gráfico de comparação
     """
     fig = go.Figure()
+    use_webgl = len(_historical_data) > WEBGL_POINT_THRESHOLD
     
     # Adiciona linha vertical para 2024
     fig.add_vline(
@@ -294,22 +428,35 @@ def create_comparison_chart(historical_data, predictions, selected_courses, y_co
         annotation_position="top right"
     )
     
+    # Mapeia o nome da coluna para o formato correto das previsões
+    prediction_column = {
+        'colocados': 'colocados_previsto',
+        'nota_ultimo_colocado': 'nota_ultimo_colocado_prevista'
+    }[y_column]
+    
+    # Agrupa os dados uma única vez; como estão ordenados por curso e ano, a última
+    # linha de cada grupo é o último ponto histórico do curso
+    grouped = _historical_data.groupby('course_id', observed=True, sort=False)
+    last_points = grouped.tail(1)
+    
     # Adiciona dados históricos para cada curso
     for course in selected_courses:
-        course_data = historical_data[historical_data['course_id'] == course]
+        if course not in last_points.index:
+            continue
+        course_data = grouped.get_group(course)
         course_name = course_data['curso'].iloc[0]
         
         # Obtém o último ponto histórico
-        last_year = course_data['ano'].max()
-        last_value = course_data[course_data['ano'] == last_year][y_column].iloc[0]
+        last_year, last_value = last_points.loc[course, ['ano', y_column]]
         
         # Cria uma cor para este curso
         line_color = px.colors.qualitative.Set1[len(fig.data) % len(px.colors.qualitative.Set1)]
         
         # Adiciona linha histórica
-        fig.add_trace(go.Scatter(
-            x=course_data['ano'],
-            y=course_data[y_column],
+        fig.add_trace(create_line_trace(
+            course_data['ano'],
+            course_data[y_column],
+            use_webgl=use_webgl,
             name=course_name,
             mode='lines+markers',
             line=dict(shape='spline', color=line_color),
@@ -317,19 +464,14 @@ def create_comparison_chart(historical_data, predictions, selected_courses, y_co
         ))
         
         # Adiciona previsão se disponível
-        course_pred = predictions[predictions['course_id'] == course]
-        if not course_pred.empty:
-            # Mapeia o nome da coluna para o formato correto das previsões
-            prediction_column = {
-                'colocados': 'colocados_previsto',
-                'nota_ultimo_colocado': 'nota_ultimo_colocado_prevista'
-            }[y_column]
-            
-            pred_value = course_pred[prediction_column].iloc[0]
+        course_pred = _predictions.get(course)
+        if course_pred is not None:
+            pred_value = course_pred[prediction_column]
             # Adiciona linha de previsão como continuação
-            fig.add_trace(go.Scatter(
-                x=[last_year, 2025],
-                y=[last_value, pred_value],
+            fig.add_trace(create_line_trace(
+                [last_year, 2025],
+                [last_value, pred_value],
+                use_webgl=use_webgl,
                 name=f"{course_name} (Previsão)",
                 mode='lines+markers',
                 line=dict(
@@ -346,18 +488,10 @@ def create_comparison_chart(historical_data, predictions, selected_courses, y_co
             ))
     
     fig.update_layout(
+        **BASE_CHART_LAYOUT,
         yaxis_title=y_axis_title,
-        xaxis_title="Ano",
         height=300,
-        xaxis=dict(tickformat='.0f'),
-        margin=dict(t=40, b=30, l=30, r=30),
-        title={
-            'text': title,
-            'x': 0.5,
-            'y': 0.95,
-            'xanchor': 'center',
-            'yanchor': 'top'
-        },
+        title={'text': title, **CHART_TITLE_POSITION},
         legend=dict(
             yanchor="top",
             y=0.99,
@@ -368,50 +502,54 @@ def create_comparison_chart(historical_data, predictions, selected_courses, y_co
     
     return fig
 
-def create_comparison_summary(df, predictions, selected_courses, selected_years):
+@st.cache_data(max_entries=COMPARISON_CACHE_ENTRIES)
+def create_comparison_summary(_historical_data, _predictions, selected_courses, selected_years):
     """
     Cria um resumo comparativo dos cursos selecionados para os anos especificados.
     
+    O resultado fica em cache, identificado pelos cursos e anos; os DataFrames não
+    são incluídos na chave (prefixo "_"), pois derivam dos cursos.
+    
     Args:
-        df (DataFrame): DataFrame com dados históricos
-        predictions (DataFrame): DataFrame com previsões
-        selected_courses (list): Lista de IDs dos cursos selecionados
-        selected_years (list): Lista de anos para o resumo
+        _historical_data (DataFrame): Dados históricos dos cursos indexados por course_id
+        _predictions (dict): Previsões para 2025 por course_id
+        selected_courses (tuple): IDs dos cursos selecionados
+        selected_years (tuple): Anos para o resumo
     
     Returns:
-        DataFrame: Resumo comparativo formatado
+        DataFrame: Resumo comparativo com valores numéricos, formatados pelo column_config na exibição
     """
+    summary_columns = ['Curso', 'Ano', 'Ocupação %', 'Nota Mínima', 'Vagas Restantes', 'Previsão']
     summary_dataframes = []
     
     for selected_year in selected_years:
         # Filtra dados para o ano selecionado
-        year_data = df[
-            (df['course_id'].isin(selected_courses)) & 
-            (df['ano'] == selected_year)
-        ]
+        year_data = _historical_data[_historical_data['ano'] == selected_year]
         
         # Se o ano selecionado for 2025, usa previsões
         if selected_year == 2025:
-            year_summary = pd.DataFrame()
+            # Acumula as linhas e cria o DataFrame uma única vez
+            rows = []
             for course in selected_courses:
-                course_pred = predictions[predictions['course_id'] == course]
-                if not course_pred.empty:
-                    course_data = df[df['course_id'] == course].iloc[0]
-                    year_summary = pd.concat([year_summary, pd.DataFrame({
-                        'Curso': [course_data['curso']],
-                        'Ano': [2025],
-                        'Ocupação %': ['Previsão'],
-                        'Nota Mínima': [course_pred['nota_ultimo_colocado_prevista'].iloc[0].round(1)],
-                        'Vagas Restantes': ['Previsão']
-                    })])
+                course_pred = _predictions.get(course)
+                if course_pred is not None:
+                    course_data = _historical_data.loc[[course]].iloc[0]
+                    rows.append({
+                        'Curso': course_data['curso'],
+                        'Ano': 2025,
+                        'Ocupação %': np.nan,
+                        'Nota Mínima': course_pred['nota_ultimo_colocado_prevista'],
+                        'Vagas Restantes': np.nan,
+                        'Previsão': True
+                    })
+            year_summary = pd.DataFrame(rows, columns=summary_columns)
         else:
             year_summary = year_data[['curso', 'ano', 'taxa_ocupacao', 'nota_ultimo_colocado', 'vagas_sobrantes']].copy()
-            year_summary.columns = ['Curso', 'Ano', 'Ocupação %', 'Nota Mínima', 'Vagas Restantes']
+            year_summary.columns = summary_columns[:-1]
             
-            # Formata porcentagem sem decimais
-            year_summary['Ocupação %'] = (year_summary['Ocupação %'] * 100).round(0).astype(int).astype(str) + '%'
-            year_summary['Nota Mínima'] = year_summary['Nota Mínima'].round(1)
-            year_summary['Ano'] = year_summary['Ano'].astype(int)
+            # Converte a taxa para porcentagem; a formatação é feita pelo column_config
+            year_summary['Ocupação %'] = year_summary['Ocupação %'] * 100
+            year_summary['Previsão'] = False
         
         summary_dataframes.append(year_summary)
     
@@ -420,17 +558,17 @@ def create_comparison_summary(df, predictions, selected_courses, selected_years)
         return pd.concat(summary_dataframes, ignore_index=True)
     return None
 
-def create_course_comparison_view(df, selected_courses, predictions):
+def create_course_comparison_view(df_by_course, selected_courses, predictions):
     """
     Cria visualizações de comparação entre cursos.
     
     Args:
-        df (DataFrame): DataFrame com dados históricos
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
         selected_courses (list): Lista de IDs dos cursos selecionados
-        predictions (DataFrame): DataFrame com previsões
+        predictions (dict): Previsões para 2025 por course_id
     """
     # Obtém dados históricos dos cursos selecionados
-    historical_data = df[df['course_id'].isin(selected_courses)]
+    historical_data = get_course_data(df_by_course, selected_courses)
     
     if historical_data.empty:
         st.warning("Nenhum dado encontrado para os cursos selecionados.")
@@ -446,7 +584,7 @@ def create_course_comparison_view(df, selected_courses, predictions):
         fig_evolution = create_comparison_chart(
             historical_data,
             predictions,
-            selected_courses,
+            tuple(selected_courses),
             'colocados',
             'Evolução do Número de Colocados',
             'Número de Colocados'
@@ -457,13 +595,31 @@ def create_course_comparison_view(df, selected_courses, predictions):
         fig_grades = create_comparison_chart(
             historical_data,
             predictions,
-            selected_courses,
+            tuple(selected_courses),
             'nota_ultimo_colocado',
             'Evolução da Nota do Último Colocado',
             'Nota'
         )
         st.plotly_chart(fig_grades, use_container_width=True)
     
+    create_comparison_summary_view(df_by_course, predictions)
+
+@st.fragment
+def create_comparison_summary_view(df_by_course, predictions):
+    """
+    Cria a tabela resumo da comparação com seleção de anos.
+    
+    Executada como fragmento, para que a seleção de anos não reconstrua os gráficos
+    de comparação. Os cursos são lidos de st.session_state, pois um fragmento
+    reexecutado reutiliza os argumentos da primeira chamada.
+    
+    Args:
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
+        predictions (dict): Previsões para 2025 por course_id
+    """
+    selected_courses = list(st.session_state.selected_courses)
+    historical_data = get_course_data(df_by_course, selected_courses)
+    
     # Tabela resumo com seleção de ano
     st.markdown("#### 📋 Resumo da Comparação")
     
@@ -483,7 +639,7 @@ def create_course_comparison_view(df, selected_courses, predictions):
         return
     
     # Cria e exibe o resumo comparativo
-    final_summary = create_comparison_summary(df, predictions, selected_courses, selected_years)
+    final_summary = create_comparison_summary(historical_data, predictions, tuple(selected_courses), tuple(selected_years))
     if final_summary is not None:
         st.dataframe(
             final_summary,
@@ -502,10 +658,11 @@ def create_course_comparison_view(df, selected_courses, predictions):
                     width="small",
                     format="%d",
                 ),
-                "Ocupação %": st.column_config.TextColumn(
+                "Ocupação %": st.column_config.NumberColumn(
                     "Ocupação %",
                     help="Taxa de ocupação do curso",
                     width="small",
+                    format="%.0f%%",
                 ),
                 "Nota Mínima": st.column_config.NumberColumn(
                     "Nota Mínima",
@@ -513,14 +670,54 @@ def create_course_comparison_view(df, selected_courses, predictions):
                     width="small",
                     format="%.1f",
                 ),
-                "Vagas Restantes": st.column_config.TextColumn(
+                "Vagas Restantes": st.column_config.NumberColumn(
                     "Vagas Restantes",
                     help="Número de vagas não preenchidas",
                     width="small",
+                    format="%d",
+                ),
+                "Previsão": st.column_config.CheckboxColumn(
+                    "Previsão",
+                    help="Valores previstos para 2025",
+                    width="small",
                 ),
             }
         )
 
+@st.cache_data
+def build_hierarchy(_df):
+    """
+    Constrói a hierarquia universidade → faculdade → cursos usada nos filtros de seleção.
+    
+    O DataFrame não é incluído na chave da cache (prefixo "_"), pois os dados
+    carregados por load_data() não mudam durante a execução da aplicação.
+    
+    Args:
+        _df (DataFrame): DataFrame com dados históricos
+    
+    Returns:
+        dict: {universidade: {faculdade: {course_id: curso}}}, com universidades e
+            faculdades em ordem decrescente e cursos ordenados pelo nome
+    """
+    # Remove duplicados baseados no course_id para evitar cursos repetidos em cada faculdade
+    courses = (
+        _df.dropna(subset=['nome_universidade'])
+        .drop_duplicates(subset=['nome_universidade', 'nome_faculdade', 'course_id'])
+        .sort_values('curso', kind='stable')
+    )
+    
+    # Distribui os cursos pela hierarquia numa única passagem, mantendo a ordem por nome
+    hierarchy = {}
+    for university, faculty, course_id, course_name in zip(
+        courses['nome_universidade'], courses['nome_faculdade'], courses['course_id'], courses['curso']
+    ):
+        hierarchy.setdefault(university, {}).setdefault(faculty, {})[course_id] = course_name
+    
+    return {
+        university: {faculty: hierarchy[university][faculty] for faculty in sorted(hierarchy[university], reverse=True)}
+        for university in sorted(hierarchy, reverse=True)
+    }
+
 def create_course_selection_ui(df, tab_key=""):
     """
     Cria a interface de seleção de curso com filtros de universidade e faculdade.
@@ -532,13 +729,14 @@ def create_course_selection_ui(df, tab_key=""):
     Returns:
         tuple: (selected_university, selected_faculty, selected_course)
     """
+    hierarchy = build_hierarchy(df)
+    
     # Cria colunas para seleção hierárquica
     col1, col2, col3 = st.columns(3)
     
     with col1:
         # Seleção de universidade
-        universities_data = df['nome_universidade'].dropna().unique()
-        universities = sorted(universities_data.tolist(), reverse=True)
+        universities = list(hierarchy)
         selected_university = st.selectbox(
             "Selecione a Universidade",
             universities,
@@ -548,8 +746,7 @@ def create_course_selection_ui(df, tab_key=""):
     
     with col2:
         # Seleção de faculdade baseada na universidade selecionada
-        faculties_data = df[df['nome_universidade'] == selected_university]['nome_faculdade'].dropna().unique()
-        faculties = sorted(faculties_data.tolist(), reverse=True)
+        faculties = list(hierarchy[selected_university])
         selected_faculty = st.selectbox(
             "Selecione a Faculdade",
             faculties,
@@ -559,14 +756,7 @@ def create_course_selection_ui(df, tab_key=""):
     
     with col3:
         # Seleção de curso baseada na universidade e faculdade selecionadas
-        courses = df[
-            (df['nome_universidade'] == selected_university) & 
-            (df['nome_faculdade'] == selected_faculty)
-        ]
-        
-        # Remove duplicados baseados no course_id para evitar cursos repetidos
-        courses_unique = courses.drop_duplicates(subset=['course_id']).sort_values('curso')
-        course_options = courses_unique.set_index('course_id')['curso'].to_dict()
+        course_options = hierarchy[selected_university][selected_faculty]
         
         selected_course = st.selectbox(
             "Selecione o Curso",
@@ -577,71 +767,152 @@ def create_course_selection_ui(df, tab_key=""):
     
     return selected_university, selected_faculty, selected_course
 
-def create_course_comparison_ui(df, selected_course):
+def add_comparison_course(course_id):
+    """
+    Adiciona um curso à lista de comparação (callback de botão).
+    
+    Args:
+        course_id (str): ID do curso a adicionar
+    """
+    st.session_state.selected_courses[course_id] = None
+
+def remove_marked_comparison_courses(editor_key, course_ids):
+    """
+    Remove da lista de comparação os cursos marcados na tabela (callback do st.data_editor).
+    
+    Args:
+        editor_key (str): Chave do st.data_editor com a tabela de cursos
+        course_ids (list): IDs dos cursos, na ordem das linhas da tabela
+    """
+    for row, changes in st.session_state[editor_key]['edited_rows'].items():
+        if changes.get('Remover'):
+            st.session_state.selected_courses.pop(course_ids[int(row)], None)
+    
+    # Muda a chave da tabela para que seja recriada sem as marcações anteriores
+    st.session_state.comparison_editor_version = st.session_state.get('comparison_editor_version', 0) + 1
+
+def clear_comparison_courses():
+    """
+    Remove todos os cursos da lista de comparação (callback de botão).
+    """
+    st.session_state.selected_courses = {}
+
+def create_course_comparison_ui(df, df_by_course, selected_course):
     """
     Cria a interface para gerenciar a lista de cursos para comparação.
     
     Args:
         df (DataFrame): DataFrame com dados históricos
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
         selected_course (str): ID do curso selecionado
     
     Returns:
         list: Lista atualizada de cursos selecionados
     """
-    # Inicializa a lista de cursos selecionados se não existir
+    # Inicializa a lista de cursos selecionados se não existir. A lista é guardada
+    # como um dicionário (que preserva a ordem de inserção), sem duplicados.
     if 'selected_courses' not in st.session_state:
         # Inicializa com cursos padrão se existirem
         default_courses = df[
             (df['nome_universidade'] == 'Universidade de Lisboa') &
             (df['nome_faculdade'] == 'Instituto Superior de Economia e Gestão') &
             (df['curso'].isin(['Economia', 'Gestão']))
-        ]['course_id'].unique().tolist()  # Use unique() to avoid duplicates
-        st.session_state.selected_courses = default_courses
+        ]['course_id'].unique().tolist()
+        st.session_state.selected_courses = dict.fromkeys(default_courses)
     
-    # Adiciona curso selecionado à lista se não estiver presente
+    # Adiciona curso selecionado à lista se não estiver presente. Os botões usam
+    # callbacks, que alteram a lista antes da reexecução do fragmento.
     if selected_course and selected_course not in st.session_state.selected_courses:
-        if st.button("Adicionar Curso à Comparação"):
-            st.session_state.selected_courses.append(selected_course)
-            st.rerun()
+        st.button("Adicionar Curso à Comparação", on_click=add_comparison_course, args=(selected_course,))
     
     # Exibe e gerencia cursos selecionados
     if st.session_state.selected_courses:
         st.markdown("#### Cursos Selecionados para Comparação")
         
-        # Remove duplicates from selected courses
-        st.session_state.selected_courses = list(dict.fromkeys(st.session_state.selected_courses))
+        # Obtém as informações de todos os cursos selecionados de uma só vez
+        course_info = build_course_metadata(df_by_course).loc[list(st.session_state.selected_courses)]
+        selected_courses_display = (
+            course_info['curso'].astype(str)
+            + ' (' + course_info['nome_universidade'].astype(str)
+            + ' - ' + course_info['nome_faculdade'].astype(str) + ')'
+        ).tolist()
         
-        # Cria um dicionário com informações dos cursos para evitar consultas repetidas
-        course_info = {}
-        for course_id in st.session_state.selected_courses:
-            course_data = df[df['course_id'] == course_id].iloc[0]
-            course_info[course_id] = {
-                'curso': course_data['curso'],
-                'universidade': course_data['nome_universidade'],
-                'faculdade': course_data['nome_faculdade'] if pd.notna(course_data['nome_faculdade']) else 'N/A'
-            }
-        
-        selected_courses_display = [
-            f"{course_info[course_id]['curso']} ({course_info[course_id]['universidade']} - {course_info[course_id]['faculdade']})"
-            for course_id in st.session_state.selected_courses
-        ]
-        
-        # Cria uma linha para cada curso selecionado com botão de remover
-        for i, (course_id, display_name) in enumerate(zip(st.session_state.selected_courses, selected_courses_display)):
-            col1, col2 = st.columns([0.9, 0.1])
-            with col1:
-                st.write(display_name)
-            with col2:
-                if st.button("❌", key=f"remove_{i}"):
-                    st.session_state.selected_courses.remove(course_id)
-                    st.rerun()
+        # Exibe os cursos selecionados numa única tabela, com uma coluna para remover
+        editor_key = f"comparison_editor_{st.session_state.get('comparison_editor_version', 0)}"
+        st.data_editor(
+            pd.DataFrame({'Curso': selected_courses_display, 'Remover': False}),
+            use_container_width=True,
+            hide_index=True,
+            disabled=['Curso'],
+            column_config={
+                "Curso": st.column_config.TextColumn(
+                    "Curso",
+                    help="Curso, universidade e faculdade",
+                ),
+                "Remover": st.column_config.CheckboxColumn(
+                    "Remover",
+                    help="Marque para remover o curso da comparação",
+                    width="small",
+                ),
+            },
+            key=editor_key,
+            on_change=remove_marked_comparison_courses,
+            args=(editor_key, list(st.session_state.selected_courses))
+        )
         
         # Botão para limpar todos
-        if st.button("Limpar Todos os Cursos"):
-            st.session_state.selected_courses = []
-            st.rerun()
+        st.button("Limpar Todos os Cursos", on_click=clear_comparison_courses)
     
-    return st.session_state.selected_courses
+    return list(st.session_state.selected_courses)
+
+@st.fragment
+def create_evolution_tab(df, df_by_course, predictions):
+    """
+    Cria o conteúdo da aba de evolução do curso.
+    
+    Executada como fragmento: alterações nos filtros desta aba reexecutam apenas
+    esta função, sem reconstruir a aba de comparação.
+    
+    Args:
+        df (DataFrame): DataFrame com dados históricos
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
+        predictions (dict): Previsões para 2025 por course_id
+    """
+    st.markdown("### Analise o desempenho de um curso ao longo do tempo")
+    
+    # Seleção de curso para evolução
+    selected_university, selected_faculty, selected_course = create_course_selection_ui(df)
+    
+    if selected_course:
+        # Usa intervalo completo de anos para visualização de evolução
+        year_range = (int(df['ano'].min()), int(df['ano'].max()))
+        create_course_evolution_view(df_by_course, predictions, selected_course, year_range)
+
+@st.fragment
+def create_comparison_tab(df, df_by_course, predictions):
+    """
+    Cria o conteúdo da aba de comparação de cursos.
+    
+    Executada como fragmento: alterações nos filtros ou na lista de cursos desta aba
+    reexecutam apenas esta função, sem reconstruir a aba de evolução.
+    
+    Args:
+        df (DataFrame): DataFrame com dados históricos
+        df_by_course (DataFrame): DataFrame com dados históricos indexado por course_id
+        predictions (dict): Previsões para 2025 por course_id
+    """
+    st.markdown("### Compare múltiplos cursos")
+    
+    # Seleção de curso para comparação
+    selected_university, selected_faculty, selected_course = create_course_selection_ui(df, "tab2")
+    
+    # Gerencia lista de cursos para comparação
+    selected_courses = create_course_comparison_ui(df, df_by_course, selected_course)
+    
+    if selected_courses:
+        create_course_comparison_view(df_by_course, selected_courses, predictions)
+    else:
+        st.info("Selecione cursos para comparar usando os filtros acima.")
 
 def main():
     """
@@ -650,7 +921,7 @@ def main():
     st.markdown('<h1 class="main-header">🎓 Painel de Análise de Cursos</h1>', unsafe_allow_html=True)
     
     # Carrega os dados
-    df, predictions = load_data()
+    df, df_by_course, predictions = load_data()
     if df is None:
         return
     
@@ -658,29 +929,10 @@ def main():
     tab1, tab2 = st.tabs(["📈 Evolução do Curso", "🔍 Comparação de Cursos"])
     
     with tab1:
-        st.markdown("### Analise o desempenho de um curso ao longo do tempo")
-        
-        # Seleção de curso para evolução
-        selected_university, selected_faculty, selected_course = create_course_selection_ui(df)
-        
-        if selected_course:
-            # Usa intervalo completo de anos para visualização de evolução
-            year_range = (int(df['ano'].min()), int(df['ano'].max()))
-            create_course_evolution_view(df, predictions, selected_course, year_range)
+        create_evolution_tab(df, df_by_course, predictions)
     
     with tab2:
-        st.markdown("### Compare múltiplos cursos")
-        
-        # Seleção de curso para comparação
-        selected_university, selected_faculty, selected_course = create_course_selection_ui(df, "tab2")
-        
-        # Gerencia lista de cursos para comparação
-        selected_courses = create_course_comparison_ui(df, selected_course)
-        
-        if selected_courses:
-            create_course_comparison_view(df, selected_courses, predictions)
-        else:
-            st.info("Selecione cursos para comparar usando os filtros acima.")
+        create_comparison_tab(df, df_by_course, predictions)
 
 if __name__ == "__main__":
     main()#   t r i g g e r   r e b u i l d  